@@ -1,21 +1,75 @@
 "use client";
 
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { LineChart, Line, AreaChart, Area, XAxis, YAxis, Tooltip, ResponsiveContainer } from 'recharts';
 import { 
   Settings, Bell, BarChart2, TrendingUp, 
   DollarSign, AlertTriangle, ChevronUp 
 } from 'lucide-react';
 
-// Sample data matching your performance chart pattern
-const performanceData = Array.from({ length: 30 }, (_, i) => ({
-  date: `Day ${i + 1}`,
-  portfolioValue: 600 + Math.sin(i/3) * 100 + (i * 2),
-  returns: (Math.sin(i/3) * 5) + 1,
-}));
+const STREAM_URL = process.env.NEXT_PUBLIC_STREAM_URL ?? 'http://localhost:8765';
+
+interface StreamPoint {
+  timestamp: number;
+  equity: number;
+  returns: number;
+}
+
+interface RiskMetrics {
+  max_drawdown?: number;
+  sharpe_ratio?: number;
+}
+
+// Messages from the Python dashboard stream (src/dashboard_stream.py). A snapshot replaces the
+// series; a delta resends every point from `since` onwards and moves the window to `window_start`.
+type StreamMessage =
+  | {
+      type: 'snapshot';
+      timeframe: string;
+      points: StreamPoint[];
+      metrics: RiskMetrics;
+    }
+  | {
+      type: 'delta';
+      timeframe: string;
+      since: number;
+      window_start: number;
+      points: StreamPoint[];
+      metrics: RiskMetrics;
+    };
+
+function applyStreamMessage(points: StreamPoint[], message: StreamMessage): StreamPoint[] {
+  if (message.type === 'snapshot') {
+    return message.points;
+  }
+  const kept = points.filter(
+    (p) => p.timestamp >= message.window_start && p.timestamp < message.since
+  );
+  return kept.concat(message.points);
+}
 
 export default function WealthbotDashboard() {
   const [activeTimeframe, setActiveTimeframe] = useState('1M');
+  const [streamPoints, setStreamPoints] = useState<StreamPoint[]>([]);
+  const [riskMetrics, setRiskMetrics] = useState<RiskMetrics>({});
+
+  useEffect(() => {
+    const source = new EventSource(`${STREAM_URL}/stream?timeframe=${activeTimeframe}`);
+    const handleMessage = (event: MessageEvent) => {
+      const message: StreamMessage = JSON.parse(event.data);
+      setStreamPoints((points) => applyStreamMessage(points, message));
+      setRiskMetrics((metrics) => ({ ...metrics, ...message.metrics }));
+    };
+    source.addEventListener('snapshot', handleMessage);
+    source.addEventListener('delta', handleMessage);
+    return () => source.close();
+  }, [activeTimeframe]);
+
+  const performanceData = streamPoints.map((p) => ({
+    date: new Date(p.timestamp * 1000).toLocaleString(),
+    portfolioValue: p.equity,
+    returns: p.returns,
+  }));
 
   return (
     <div className="min-h-screen bg-[#0B1221] text-white">
@@ -174,12 +228,16 @@ export default function WealthbotDashboard() {
                 <div className="flex justify-between mb-2">
                   <span className="text-gray-400">Max Drawdown</span>
                   <span className="text-yellow-500 flex items-center">
-                    8.50% <AlertTriangle className="h-4 w-4 ml-1" />
+                    {riskMetrics.max_drawdown !== undefined
+                      ? `${(riskMetrics.max_drawdown * 100).toFixed(2)}%`
+                      : '--'} <AlertTriangle className="h-4 w-4 ml-1" />
                   </span>
                 </div>
                 <div className="flex justify-between mb-2">
                   <span className="text-gray-400">Sharpe Ratio</span>
-                  <span className="text-green-500">1.80</span>
+                  <span className="text-green-500">
+                    {riskMetrics.sharpe_ratio !== undefined ? riskMetrics.sharpe_ratio.toFixed(2) : '--'}
+                  </span>
                 </div>
               </div>
 
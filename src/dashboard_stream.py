@@ -0,0 +1,273 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Deque
+from urllib.parse import urlparse, parse_qs
+import asyncio
+import json
+import logging
+import math
+
+# Window length in seconds for each dashboard timeframe; None covers the full history
+TIMEFRAMES: Dict[str, Optional[float]] = {
+    '1D': 86400.0,
+    '1W': 7 * 86400.0,
+    '1M': 30 * 86400.0,
+    '3M': 91 * 86400.0,
+    '1Y': 365 * 86400.0,
+    'ALL': None
+}
+
+
+@dataclass
+class _Bucket:
+    """Min/max/last summary of the ticks falling into one time bucket"""
+    start: float
+    low: Dict[str, Any]
+    high: Dict[str, Any]
+    last: Dict[str, Any]
+
+    @classmethod
+    def from_point(cls, start: float, point: Dict[str, Any]) -> '_Bucket':
+        return cls(start, point, point, point)
+
+    def add(self, point: Dict[str, Any], value_key: str):
+        if point[value_key] < self.low[value_key]:
+            self.low = point
+        if point[value_key] > self.high[value_key]:
+            self.high = point
+        if point['timestamp'] >= self.last['timestamp']:
+            self.last = point
+
+    def merge(self, other: '_Bucket', value_key: str):
+        self.add(other.low, value_key)
+        self.add(other.high, value_key)
+        self.add(other.last, value_key)
+
+    def points(self) -> List[Dict[str, Any]]:
+        """Distinct extreme and closing points of the bucket in time order"""
+        unique = {id(p): p for p in (self.low, self.high, self.last)}
+        return sorted(unique.values(), key=lambda p: p['timestamp'])
+
+
+class DownsamplingPyramid:
+    """Min/max bucket pyramid over a tick series, one level per power-of-two bucket width"""
+
+    def __init__(self, base_width: float = 1.0, max_buckets: int = 100, value_key: str = 'equity'):
+        self.base_width = base_width
+        self.max_buckets = max_buckets
+        self.value_key = value_key
+        self.levels: List[Deque[_Bucket]] = [deque(maxlen=2 * max_buckets)]
+        self.latest_timestamp: Optional[float] = None
+
+    def width(self, level: int) -> float:
+        return self.base_width * (2 ** level)
+
+    def add(self, point: Dict[str, Any]):
+        """Fold a tick into every level of the pyramid"""
+        if self.latest_timestamp is not None and point['timestamp'] < self.latest_timestamp:
+            # Late ticks are stamped with the latest time so they land in every level's open bucket;
+            # keeping the older time would place them before a delta's `since` and duplicate them
+            point = {**point, 'timestamp': self.latest_timestamp}
+        timestamp = point['timestamp']
+        level = 0
+        while level < len(self.levels):
+            buckets = self.levels[level]
+            start = math.floor(timestamp / self.width(level)) * self.width(level)
+            if buckets and start == buckets[-1].start:
+                buckets[-1].add(point, self.value_key)
+            else:
+                if level == len(self.levels) - 1 and len(buckets) >= self.max_buckets:
+                    self._grow()
+                buckets.append(_Bucket.from_point(start, point))
+            level += 1
+
+        if self.latest_timestamp is None or timestamp > self.latest_timestamp:
+            self.latest_timestamp = timestamp
+
+    def _grow(self):
+        """Add a coarser level built by merging pairs of buckets from the current top level"""
+        width = self.width(len(self.levels))
+        merged: Deque[_Bucket] = deque(maxlen=2 * self.max_buckets)
+        for bucket in self.levels[-1]:
+            start = math.floor(bucket.start / width) * width
+            if merged and merged[-1].start == start:
+                merged[-1].merge(bucket, self.value_key)
+            else:
+                merged.append(_Bucket(start, bucket.low, bucket.high, bucket.last))
+        self.levels.append(merged)
+
+    def view(self, window: Optional[float]) -> Tuple[int, List[_Bucket]]:
+        """Return the level and buckets covering the trailing window at no more than max_buckets resolution"""
+        if self.latest_timestamp is None:
+            return 0, []
+
+        top = len(self.levels) - 1
+        if window is None:
+            level = top
+            # The coarsest level always spans the full history; pick the finest one that still does
+            for candidate in range(top):
+                buckets = self.levels[candidate]
+                if len(buckets) < buckets.maxlen and len(buckets) <= self.max_buckets:
+                    level = candidate
+                    break
+            return level, list(self.levels[level])
+
+        level = 0
+        while level < top and self.width(level) * self.max_buckets < window:
+            level += 1
+        cutoff = self.latest_timestamp - window
+        width = self.width(level)
+        return level, [b for b in self.levels[level] if b.start + width > cutoff]
+
+
+class _Subscription:
+    """Per-client stream state used to compute deltas"""
+
+    def __init__(self, timeframe: str, max_queue: int):
+        self.timeframe = timeframe
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.level: Optional[int] = None
+        self.since: Optional[float] = None
+        self.version = -1
+
+
+class DashboardStreamManager:
+    """Keeps downsampled performance series per timeframe and streams them to the dashboard"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.pyramid = DownsamplingPyramid(
+            base_width=config.get('base_bucket_seconds', 1.0),
+            max_buckets=config.get('max_buckets', 100)
+        )
+        self.push_interval = config.get('push_interval', 1.0)
+        self.heartbeat_interval = config.get('heartbeat_interval', 15.0)
+        self.max_queue = config.get('max_queue', 64)
+        # The stream is unauthenticated, so only the dashboard's own origin may read it by default
+        self.allowed_origin = config.get('allowed_origin', 'http://localhost:3000')
+        self.initial_equity: Optional[float] = None
+        self.latest_metrics: Dict[str, Any] = {}
+        self.subscribers: List[_Subscription] = []
+        self.version = 0
+        self.logger = logging.getLogger('DashboardStream')
+
+    def record(self, timestamp: float, equity: float, metrics: Optional[Dict[str, Any]] = None):
+        """Record a portfolio update; must be called on the event loop running run()/flush(), which read it unlocked"""
+        if self.initial_equity is None:
+            self.initial_equity = equity
+        point = {
+            'timestamp': timestamp,
+            'equity': equity,
+            'returns': (equity / self.initial_equity - 1) * 100 if self.initial_equity else 0.0
+        }
+        self.pyramid.add(point)
+        if metrics:
+            self.latest_metrics.update(metrics)
+        self.version += 1
+
+    def subscribe(self, timeframe: str) -> _Subscription:
+        """Register a client and queue its initial snapshot"""
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unknown timeframe: {timeframe}")
+        subscription = _Subscription(timeframe, self.max_queue)
+        subscription.queue.put_nowait(self._snapshot(subscription))
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: _Subscription):
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+
+    def flush(self):
+        """Push pending deltas to every subscriber"""
+        for subscription in self.subscribers:
+            if subscription.version == self.version:
+                continue
+            message = self._delta(subscription)
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client gets its backlog replaced by a fresh snapshot
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(self._snapshot(subscription))
+
+    def _snapshot(self, subscription: _Subscription) -> Dict[str, Any]:
+        level, buckets = self.pyramid.view(TIMEFRAMES[subscription.timeframe])
+        subscription.level = level
+        subscription.since = buckets[-1].start if buckets else None
+        subscription.version = self.version
+        return {
+            'type': 'snapshot',
+            'timeframe': subscription.timeframe,
+            'points': [p for b in buckets for p in b.points()],
+            'metrics': dict(self.latest_metrics)
+        }
+
+    def _delta(self, subscription: _Subscription) -> Dict[str, Any]:
+        """Points from the last sent (possibly still open) bucket onwards, plus the new window start"""
+        level, buckets = self.pyramid.view(TIMEFRAMES[subscription.timeframe])
+        if level != subscription.level or subscription.since is None:
+            return self._snapshot(subscription)
+
+        since = subscription.since
+        changed = [b for b in buckets if b.start >= since]
+        subscription.since = buckets[-1].start
+        subscription.version = self.version
+        return {
+            'type': 'delta',
+            'timeframe': subscription.timeframe,
+            'since': since,
+            'window_start': buckets[0].start,
+            'points': [p for b in changed for p in b.points()],
+            'metrics': dict(self.latest_metrics)
+        }
+
+    async def run(self, host: str = '127.0.0.1', port: int = 8765):
+        """Serve the SSE endpoint and push deltas every push_interval seconds"""
+        server = await asyncio.start_server(self._handle_client, host, port)
+        self.logger.info(f"Dashboard stream listening on {host}:{port}")
+        async with server:
+            while True:
+                self.flush()
+                await asyncio.sleep(self.push_interval)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+
+            url = urlparse(request_line[1]) if len(request_line) >= 2 else None
+            if url is None or url.path != '/stream':
+                writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n')
+                return
+            timeframe = parse_qs(url.query).get('timeframe', ['1M'])[0]
+            if timeframe not in TIMEFRAMES:
+                writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n')
+                return
+
+            writer.write((
+                'HTTP/1.1 200 OK\r\n'
+                'Content-Type: text/event-stream\r\n'
+                'Cache-Control: no-cache\r\n'
+                'Connection: keep-alive\r\n'
+                f'Access-Control-Allow-Origin: {self.allowed_origin}\r\n\r\n'
+            ).encode())
+            subscription = self.subscribe(timeframe)
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_interval)
+                        writer.write(f"event: {message['type']}\ndata: {json.dumps(message)}\n\n".encode())
+                    except asyncio.TimeoutError:
+                        writer.write(b': keepalive\n\n')
+                    await writer.drain()
+            finally:
+                self.unsubscribe(subscription)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Error streaming to dashboard client: {str(e)}")
+        finally:
+            writer.close()
@@ -0,0 +1,204 @@
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+# Prompt per research section and subsection, matching what ResearchPipelineManager parses
+SECTION_PROMPTS: Dict[str, Dict[str, str]] = {
+    'strategy_analysis': {
+        'entry': "Describe concrete entry conditions for a {topic} trading strategy.",
+        'exit': "Describe concrete exit conditions for a {topic} trading strategy.",
+        'position': "Describe position sizing rules for a {topic} trading strategy.",
+        'risk': "Describe risk parameters and limits for a {topic} trading strategy."
+    },
+    'ml_implementation': {
+        'features': "List the input features an ML model should use for {topic} trading.",
+        'models': "Recommend ML model architectures for {topic} trading and justify them.",
+        'training': "Describe a training and validation procedure for {topic} trading models."
+    }
+}
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        # asyncio locks are bound to one event loop while the bucket state may outlive it
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        # Waiters are served one at a time so a large request cannot be starved by small ones
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+
+class ResponseCache:
+    """On-disk LLM response cache keyed by model and prompt hash"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+    def _path(self, model: str, prompt: str) -> Path:
+        key = self.key(model, prompt)
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        path = self._path(model, prompt)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)['response']
+
+    def put(self, model: str, prompt: str, response: str):
+        path = self._path(model, prompt)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'model': model, 'prompt': prompt, 'response': response}, f)
+        os.replace(tmp_path, path)
+
+
+class ResearchGenerator:
+    """Generates raw research JSON for ResearchPipelineManager by fanning prompts out to an LLM"""
+
+    def __init__(self, base_path: Path, llm: Any, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.base_path = base_path
+        self.llm = llm
+        self.model_name = (
+            config.get('model_name')
+            or getattr(llm, 'model_name', None)
+            or getattr(llm, 'model', None)
+            or type(llm).__name__
+        )
+        self.raw_research_path = base_path / 'data' / 'raw_research'
+        self.raw_research_path.mkdir(parents=True, exist_ok=True)
+        self.cache = ResponseCache(config.get('cache_dir', base_path / 'data' / 'llm_cache'))
+        self.rate_limiter = TokenBucket(config.get('requests_per_minute', 60) / 60.0, config.get('burst'))
+        self.max_concurrency = config.get('max_concurrency', 4)
+        self.max_retries = config.get('max_retries', 3)
+        self.retry_backoff = config.get('retry_backoff', 1.0)
+        self.logger = logging.getLogger('ResearchGenerator')
+        self.stats = {'cache_hits': 0, 'llm_calls': 0}
+        self.failed_topics: Dict[str, str] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def _complete(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        cached = self.cache.get(self.model_name, prompt)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            return cached
+
+        # Concurrent callers with the same prompt share one LLM call instead of all missing the cache
+        key = self.cache.key(self.model_name, prompt)
+        call = self._in_flight.get(key)
+        if call is None:
+            call = asyncio.ensure_future(self._call_llm(prompt, semaphore))
+            self._in_flight[key] = call
+            call.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats['cache_hits'] += 1
+        return await asyncio.shield(call)
+
+    async def _call_llm(self, prompt: str, semaphore: asyncio.Semaphore) -> str:
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                await self.rate_limiter.acquire()
+                try:
+                    self.stats['llm_calls'] += 1
+                    response = await self.llm.ainvoke(prompt)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        self.logger.error(f"LLM call failed after {attempt + 1} attempts: {str(e)}")
+                        raise
+                    self.logger.warning(f"LLM call failed ({str(e)}), retrying")
+            await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+        # LangChain chat models return a message object; plain LLMs return a string
+        text = getattr(response, 'content', response)
+        self.cache.put(self.model_name, prompt, text)
+        return text
+
+    async def _generate_topic(self, topic: str, semaphore: asyncio.Semaphore) -> str:
+        tasks = {
+            (section, subsection): asyncio.create_task(self._complete(template.format(topic=topic), semaphore))
+            for section, templates in SECTION_PROMPTS.items()
+            for subsection, template in templates.items()
+        }
+        await asyncio.gather(*tasks.values())
+
+        research_data: Dict[str, Any] = {
+            'topic': topic,
+            'model': self.model_name,
+            'generated_at': datetime.now().isoformat()
+        }
+        for (section, subsection), task in tasks.items():
+            research_data.setdefault(section, {})[subsection] = task.result()
+
+        research_file = self._write_research_file(topic, research_data)
+
+        self.logger.info(f"Generated research file {research_file} for topic {topic}")
+        return research_file
+
+    def _write_research_file(self, topic: str, research_data: Dict[str, Any]) -> str:
+        """Write research under a new file name; topics may share a slug and generation timestamp"""
+        slug = re.sub(r'[^a-z0-9]+', '_', topic.lower()).strip('_')
+        stem = f"research_{slug}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        suffix = 0
+        while True:
+            research_file = f'{stem}.json' if suffix == 0 else f'{stem}_{suffix}.json'
+            try:
+                with open(self.raw_research_path / research_file, 'x') as f:
+                    json.dump(research_data, f, indent=2)
+                return research_file
+            except FileExistsError:
+                suffix += 1
+
+    async def generate(self, topics: List[str]) -> Dict[str, str]:
+        """Generate one raw research file per topic, returning file names for the topics that succeeded"""
+        topics = list(dict.fromkeys(topics))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._generate_topic(topic, semaphore) for topic in topics),
+            return_exceptions=True
+        )
+
+        research_files: Dict[str, str] = {}
+        self.failed_topics = {}
+        for topic, result in zip(topics, results):
+            if isinstance(result, BaseException):
+                self.logger.error(f"Research generation failed for topic {topic}: {str(result)}")
+                self.failed_topics[topic] = str(result)
+            else:
+                research_files[topic] = result
+        return research_files
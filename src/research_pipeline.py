@@ -1,6 +1,6 @@
 from pathlib import Path
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import logging
 from datetime import datetime
 import os
@@ -41,8 +41,8 @@ class ResearchPipelineManager:
         
         return logger
         
-    def process_research_findings(self, research_file: str) -> Dict[str, Any]:
-        """Process raw research into implementable components"""
+    def process_research_findings(self, research_file: str, output_stem: Optional[str] = None) -> Dict[str, Any]:
+        """Process raw research into implementable components, optionally naming the output after output_stem"""
         try:
             # Load raw research
             with open(self.raw_research_path / research_file, 'r') as f:
@@ -56,8 +56,9 @@ class ResearchPipelineManager:
             }
             
             # Save processed components
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f'processed_components_{timestamp}.json'
+            if output_stem is None:
+                output_stem = datetime.now().strftime('%Y%m%d_%H%M%S')
+            output_file = f'processed_components_{output_stem}.json'
             
             with open(self.processed_path / output_file, 'w') as f:
                 json.dump(components, f, indent=2)
@@ -69,6 +70,19 @@ class ResearchPipelineManager:
             self.logger.error(f"Error processing research file {research_file}: {str(e)}")
             raise
             
+    async def generate_and_process(self, generator, topics: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Generate raw research with a ResearchGenerator and process it, keyed by the topics that succeeded"""
+        research_files = await generator.generate(topics)
+        self.logger.info(
+            f"Generated {len(research_files)} research files ({generator.stats}); "
+            f"failed topics: {list(generator.failed_topics)}"
+        )
+        # Each output is named after its research file so results processed within the same second do not collide
+        return {
+            topic: self.process_research_findings(research_file, output_stem=Path(research_file).stem)
+            for topic, research_file in research_files.items()
+        }
+            
     def _extract_strategy_components(self, research_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract strategy components from research"""
         strategy_analysis = research_data.get('strategy_analysis', {})
@@ -0,0 +1,421 @@
+from collections import defaultdict, deque
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import importlib
+import json
+import logging
+import multiprocessing as mp
+import queue
+import struct
+import time
+import zlib
+
+# Emergency stop content is passed through a fixed-size shared buffer; json.dumps escapes
+# non-ASCII characters to at most 12 bytes each, so these limits always fit
+EMERGENCY_REASON_LIMIT = 256
+EMERGENCY_SEVERITY_LIMIT = 32
+EMERGENCY_CONTENT_SIZE = 12 * (EMERGENCY_REASON_LIMIT + EMERGENCY_SEVERITY_LIMIT) + 64
+
+# Width of the symbol field in ring buffer records
+SYMBOL_BYTES = 16
+
+
+class SharedRingBuffer:
+    """Single-producer/single-consumer ring of market data ticks in shared memory"""
+
+    HEADER = struct.Struct('<Q')
+    RECORD = struct.Struct(f'<q{SYMBOL_BYTES}sddd')  # sequence, symbol, price, volume, timestamp
+    SEQUENCE = struct.Struct('<q')
+
+    def __init__(self, capacity: int = 4096, name: Optional[str] = None):
+        self.capacity = capacity
+        self.read_index = 0
+        self.overruns = 0
+        if name is None:
+            size = self.HEADER.size + capacity * self.RECORD.size
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.HEADER.pack_into(self.shm.buf, 0, 0)
+            self.owner = True
+        else:
+            # Workers share the parent's resource tracker, so attaching must not unregister the
+            # segment; the tracker keeps it listed for cleanup if the owning process dies
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def _offset(self, index: int) -> int:
+        return self.HEADER.size + (index % self.capacity) * self.RECORD.size
+
+    def write(self, symbol: str, price: float, volume: float, timestamp: float):
+        encoded = _encode_symbol(symbol)
+        buf = self.shm.buf
+        index = self.HEADER.unpack_from(buf, 0)[0]
+        offset = self._offset(index)
+        # The slot is marked in-flight first so a lagging reader can detect a torn record
+        self.SEQUENCE.pack_into(buf, offset, -1)
+        self.RECORD.pack_into(buf, offset, -1, encoded, price, volume, timestamp)
+        self.SEQUENCE.pack_into(buf, offset, index)
+        self.HEADER.pack_into(buf, 0, index + 1)
+
+    def read(self, max_records: Optional[int] = None) -> List[Tuple[str, float, float, float]]:
+        """Return unread ticks, skipping ahead if the producer lapped this reader"""
+        buf = self.shm.buf
+        write_index = self.HEADER.unpack_from(buf, 0)[0]
+        if write_index - self.read_index > self.capacity:
+            self.overruns += write_index - self.capacity - self.read_index
+            self.read_index = write_index - self.capacity
+
+        records = []
+        while self.read_index < write_index and (max_records is None or len(records) < max_records):
+            offset = self._offset(self.read_index)
+            sequence, symbol, price, volume, timestamp = self.RECORD.unpack_from(buf, offset)
+            if sequence != self.read_index or self.SEQUENCE.unpack_from(buf, offset)[0] != self.read_index:
+                # Overwritten while being read; resynchronise on the next call
+                self.overruns += 1
+                self.read_index += 1
+                continue
+            records.append((symbol.rstrip(b'\0').decode(), price, volume, timestamp))
+            self.read_index += 1
+        return records
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _encode_symbol(symbol: str) -> bytes:
+    """Encode a symbol for the ring buffer, rejecting ones that would be truncated"""
+    encoded = symbol.encode()
+    if len(encoded) > SYMBOL_BYTES:
+        raise ValueError(f"Symbol {symbol!r} exceeds {SYMBOL_BYTES} bytes")
+    return encoded
+
+
+def shard_for(key: str, num_shards: int) -> int:
+    """Stable shard assignment that does not depend on PYTHONHASHSEED"""
+    return zlib.crc32(key.encode()) % num_shards
+
+
+class _ShardWorker:
+    """Hosts a subset of agents on its own asyncio loop inside a worker process"""
+
+    def __init__(self, shard_id: int, agent_specs: Dict[str, Dict[str, Any]], ring_name: str,
+                 ring_capacity: int, conn, emergency_generation, emergency_content, ack_queue,
+                 result_queue, settings: Dict[str, Any]):
+        self.shard_id = shard_id
+        self.agent_specs = agent_specs
+        self.ring = SharedRingBuffer(ring_capacity, name=ring_name)
+        self.conn = conn
+        self.emergency_generation = emergency_generation
+        self.emergency_content = emergency_content
+        self.ack_queue = ack_queue
+        self.result_queue = result_queue
+        self.poll_interval = settings.get('poll_interval', 0.001)
+        self.batch_size = settings.get('batch_size', 256)
+        self.history_length = settings.get('history_length', 100)
+        self.agents: Dict[str, Any] = {}
+        self.symbol_agents: Dict[str, List[str]] = defaultdict(list)
+        self.price_history: Dict[str, deque] = {}
+        self.volume_history: Dict[str, deque] = {}
+        self.handled_generation = 0
+        self.running = True
+        self.logger = logging.getLogger(f'ShardedRuntime.shard{shard_id}')
+
+    def _load_agent(self, agent_id: str, spec: Dict[str, Any]):
+        module_path, class_name = spec['agent_class'].split(':')
+        agent_class = getattr(importlib.import_module(module_path), class_name)
+        return agent_class(agent_id, spec)
+
+    async def run(self):
+        for agent_id, spec in self.agent_specs.items():
+            agent = self._load_agent(agent_id, spec)
+            await agent.initialize()
+            self.agents[agent_id] = agent
+            for symbol in _agent_symbols(spec):
+                self.symbol_agents[symbol].append(agent_id)
+        self.logger.info(f"Shard {self.shard_id} started with agents {list(self.agents)}")
+
+        try:
+            while self.running:
+                await self._check_emergency()
+                busy = await self._poll_commands()
+                ticks = self.ring.read(self.batch_size)
+                for symbol, price, volume, timestamp in ticks:
+                    await self._handle_tick(symbol, price, volume, timestamp)
+                if not busy and not ticks:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            for agent in self.agents.values():
+                await agent.shutdown()
+            self.ring.close()
+
+    async def _check_emergency(self):
+        if self.emergency_generation.value <= self.handled_generation:
+            return
+        with self.emergency_generation.get_lock():
+            generation = self.emergency_generation.value
+            raw_content = self.emergency_content.value
+
+        try:
+            content = json.loads(raw_content.decode())
+        except ValueError as e:
+            self.logger.error(f"Unreadable emergency stop content: {str(e)}")
+            content = {'reason': 'unknown', 'severity': 'high'}
+        envelope = _envelope('runtime', 'emergency_stop', content, priority=3)
+        results = {}
+        for agent_id, agent in self.agents.items():
+            results[agent_id] = await self._dispatch(agent_id, agent, envelope, check_emergency=False)
+        self.handled_generation = generation
+        self.ack_queue.put((self.shard_id, generation, results))
+
+    async def _poll_commands(self) -> bool:
+        busy = False
+        while self.conn.poll():
+            busy = True
+            command, target, envelope = self.conn.recv()
+            if command == 'shutdown':
+                self.running = False
+                return busy
+            targets = [target] if target is not None else list(self.agents)
+            for agent_id in targets:
+                if agent_id in self.agents:
+                    await self._dispatch(agent_id, self.agents[agent_id], envelope)
+        return busy
+
+    async def _handle_tick(self, symbol: str, price: float, volume: float, timestamp: float):
+        prices = self.price_history.setdefault(symbol, deque(maxlen=self.history_length))
+        volumes = self.volume_history.setdefault(symbol, deque(maxlen=self.history_length))
+        prices.append(price)
+        volumes.append(volume)
+        content = {
+            'type': 'market_data',
+            'symbol': symbol,
+            'price': price,
+            'volume': volume,
+            'price_history': list(prices),
+            'volume_history': list(volumes)
+        }
+        envelope = _envelope('market_data_provider', 'market_data', content, priority=1,
+                             timestamp=datetime.fromtimestamp(timestamp))
+        for agent_id in self.symbol_agents.get(symbol, []):
+            await self._dispatch(agent_id, self.agents[agent_id], envelope)
+
+    async def _dispatch(self, agent_id: str, agent, envelope: Dict[str, Any], check_emergency: bool = True):
+        if check_emergency:
+            await self._check_emergency()
+        try:
+            result = await agent.process_message(envelope)
+        except Exception as e:
+            self.logger.error(f"Agent {agent_id} failed to process {envelope['message_type']}: {str(e)}")
+            result = {'status': 'error', 'error': str(e)}
+        if result is not None:
+            self.result_queue.put((self.shard_id, agent_id, result))
+        return result
+
+
+def _run_shard(*args):
+    """Worker process entry point"""
+    asyncio.run(_ShardWorker(*args).run())
+
+
+def _agent_symbols(spec: Dict[str, Any]) -> List[str]:
+    if 'symbols' in spec:
+        return list(spec['symbols'])
+    return [spec['symbol']] if 'symbol' in spec else []
+
+
+def _envelope(sender: str, message_type: str, content: Dict[str, Any], priority: int,
+              timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    return {
+        'sender': sender,
+        'message_type': message_type,
+        'content': content,
+        'priority': priority,
+        'timestamp': timestamp or datetime.now()
+    }
+
+
+class ShardedAgentRuntime:
+    """Runs agents across worker processes, sharded by symbol or agent id"""
+
+    def __init__(self, agent_configs: Dict[str, Dict[str, Any]], runtime_config: Optional[Dict[str, Any]] = None):
+        runtime_config = runtime_config or {}
+        self.agent_configs = agent_configs
+        self.num_shards = runtime_config.get('workers', mp.cpu_count())
+        self.shard_by = runtime_config.get('shard_by', 'agent_id')
+        self.ring_capacity = runtime_config.get('ring_capacity', 4096)
+        self.emergency_timeout = runtime_config.get('emergency_timeout', 0.5)
+        self.settings = {
+            key: runtime_config[key]
+            for key in ('poll_interval', 'batch_size', 'history_length')
+            if key in runtime_config
+        }
+        self.context = mp.get_context(runtime_config.get('start_method', 'spawn'))
+        self.logger = logging.getLogger('ShardedRuntime')
+
+        if self.shard_by not in ('agent_id', 'symbol'):
+            raise ValueError(f"Unknown shard_by value: {self.shard_by}")
+
+        self.agent_shards = {agent_id: self._assign(agent_id, spec) for agent_id, spec in agent_configs.items()}
+        self.symbol_shards: Dict[str, set] = defaultdict(set)
+        for agent_id, spec in agent_configs.items():
+            for symbol in _agent_symbols(spec):
+                _encode_symbol(symbol)
+                self.symbol_shards[symbol].add(self.agent_shards[agent_id])
+
+        self.processes: Dict[int, Any] = {}
+        self.terminated: set = set()
+        self.connections: Dict[int, Any] = {}
+        self.rings: Dict[int, SharedRingBuffer] = {}
+        self.emergency_generation = None
+        self.emergency_content = None
+        self.ack_queue = None
+        self.result_queue = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'ShardedAgentRuntime':
+        """Build a runtime from the system config's `agents` and `runtime` sections"""
+        return cls(config.get('agents', {}), config.get('runtime', {}))
+
+    def _assign(self, agent_id: str, spec: Dict[str, Any]) -> int:
+        symbols = _agent_symbols(spec)
+        key = symbols[0] if self.shard_by == 'symbol' and symbols else agent_id
+        return shard_for(key, self.num_shards)
+
+    def start(self):
+        """Spawn one worker process per shard that has agents"""
+        self.emergency_generation = self.context.Value('Q', 0)
+        self.emergency_content = self.context.Array('c', EMERGENCY_CONTENT_SIZE)
+        self.ack_queue = self.context.Queue()
+        self.result_queue = self.context.Queue()
+
+        shards: Dict[int, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        for agent_id, shard_id in self.agent_shards.items():
+            shards[shard_id][agent_id] = self.agent_configs[agent_id]
+
+        for shard_id, specs in shards.items():
+            ring = SharedRingBuffer(self.ring_capacity)
+            parent_conn, child_conn = self.context.Pipe()
+            process = self.context.Process(
+                target=_run_shard,
+                args=(shard_id, specs, ring.name, self.ring_capacity, child_conn, self.emergency_generation,
+                      self.emergency_content, self.ack_queue, self.result_queue, self.settings),
+                name=f'agent-shard-{shard_id}',
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.rings[shard_id] = ring
+            self.connections[shard_id] = parent_conn
+            self.processes[shard_id] = process
+
+        self.logger.info(f"Started {len(self.processes)} agent shards by {self.shard_by}")
+
+    def publish_market_data(self, symbol: str, price: float, volume: float, timestamp: Optional[float] = None):
+        """Write a tick into the ring buffer of every shard trading the symbol"""
+        timestamp = time.time() if timestamp is None else timestamp
+        for shard_id in self.symbol_shards.get(symbol, ()):
+            self.rings[shard_id].write(symbol, price, volume, timestamp)
+
+    def _send(self, shard_id: int, command: Tuple) -> bool:
+        """Send a command to a shard, skipping shards that have died or been terminated"""
+        # terminate() is asynchronous, so a shard just terminated may still report alive
+        if shard_id in self.terminated or not self.processes[shard_id].is_alive():
+            self.logger.warning(f"Shard {shard_id} is not running; dropping {command[0]}")
+            return False
+        try:
+            self.connections[shard_id].send(command)
+            return True
+        except (BrokenPipeError, OSError) as e:
+            self.logger.warning(f"Shard {shard_id} is unreachable ({str(e)}); dropping {command[0]}")
+            return False
+
+    def send_message(self, agent_id: str, envelope: Dict[str, Any]) -> bool:
+        """Deliver a process_message envelope to a single agent; False if its shard is down"""
+        return self._send(self.agent_shards[agent_id], ('message', agent_id, envelope))
+
+    def broadcast(self, envelope: Dict[str, Any]) -> Dict[int, bool]:
+        """Deliver a process_message envelope to every agent, reporting delivery per shard"""
+        return {shard_id: self._send(shard_id, ('message', None, envelope)) for shard_id in self.connections}
+
+    def collect_results(self) -> List[Tuple[int, str, Any]]:
+        """Drain results returned by agents since the last call"""
+        results = []
+        while True:
+            try:
+                results.append(self.result_queue.get_nowait())
+            except queue.Empty:
+                return results
+
+    def emergency_stop(self, reason: str, severity: str = 'high') -> Dict[int, Any]:
+        """Fan out emergency_stop; returns agent results per shard, or 'terminated'/'dead' if it was not handled"""
+        deadline = time.monotonic() + self.emergency_timeout
+        content = json.dumps({
+            'reason': reason[:EMERGENCY_REASON_LIMIT],
+            'severity': severity[:EMERGENCY_SEVERITY_LIMIT]
+        }).encode()
+        # Signalled through shared memory rather than the pipes so a backed-up shard cannot delay the others.
+        # Each stop gets a new generation so back-to-back stops are never mistaken for one already handled.
+        with self.emergency_generation.get_lock():
+            self.emergency_content.value = content
+            self.emergency_generation.value += 1
+            generation = self.emergency_generation.value
+
+        statuses: Dict[int, Any] = {}
+        pending = set()
+        for shard_id, process in self.processes.items():
+            if shard_id in self.terminated:
+                statuses[shard_id] = 'terminated'
+            elif process.is_alive():
+                pending.add(shard_id)
+            else:
+                self.logger.error(f"Shard {shard_id} was not running (exit code {process.exitcode})")
+                statuses[shard_id] = 'dead'
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                shard_id, acked_generation, results = self.ack_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if acked_generation != generation:
+                continue
+            statuses[shard_id] = results
+            pending.discard(shard_id)
+
+        for shard_id in pending:
+            self.logger.error(f"Shard {shard_id} missed the emergency stop deadline; terminating")
+            self.processes[shard_id].terminate()
+            self.terminated.add(shard_id)
+            statuses[shard_id] = 'terminated'
+
+        self.logger.warning(f"Emergency stop ({reason}) delivered to {len(statuses)} shards")
+        return statuses
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop all shards and release shared memory"""
+        for conn in self.connections.values():
+            try:
+                conn.send(('shutdown', None, None))
+            except (BrokenPipeError, OSError):
+                pass
+        for shard_id, process in self.processes.items():
+            process.join(timeout)
+            if process.is_alive():
+                self.logger.error(f"Shard {shard_id} did not stop in time; terminating")
+                process.terminate()
+                process.join()
+        for ring in self.rings.values():
+            ring.close()
+        self.processes.clear()
+        self.terminated.clear()
+        self.connections.clear()
+        self.rings.clear()
+        self.logger.info("Sharded runtime shut down")
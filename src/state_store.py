@@ -0,0 +1,281 @@
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import copy
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+# Agent attributes persisted by capture_agent/restore_agent
+AGENT_STATE_ATTRIBUTES = ('current_positions', 'performance_metrics', 'risk_metrics', 'market_regime')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS wal_entries (
+    seq INTEGER PRIMARY KEY,
+    op TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    key TEXT,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    last_seq INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def sqlite_path(database_url: str) -> str:
+    """Convert a sqlite:/// database URL into a filesystem path"""
+    prefix = 'sqlite:///'
+    if not database_url.startswith(prefix):
+        raise ValueError(f"Unsupported database URL: {database_url}")
+    return database_url[len(prefix):]
+
+
+class StateStore:
+    """Write-ahead log plus periodic compact snapshots of agent state, persisted to sqlite"""
+
+    def __init__(self, db_path: str, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.db_path = str(db_path)
+        self.snapshot_interval = config.get('snapshot_interval', 300)
+        self.snapshot_every = config.get('snapshot_every', 50000)
+        self.flush_interval = config.get('flush_interval', 0.05)
+        self.batch_size = config.get('batch_size', 1000)
+        self.max_write_retries = config.get('max_write_retries', 3)
+        self.retry_backoff = config.get('retry_backoff', 0.1)
+        self.logger = logging.getLogger('StateStore')
+
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loaded = False
+        self._error: Optional[Exception] = None
+        self._entries_since_snapshot = 0
+        self._last_snapshot = time.monotonic()
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'StateStore':
+        """Build a store from the system config's database_url and backup_interval"""
+        return cls(sqlite_path(config['database_url']), {
+            'snapshot_interval': config.get('backup_interval', 300),
+            **config.get('state_store', {})
+        })
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Rebuild state from the latest snapshot and replay the log tail written after it"""
+        started = time.perf_counter()
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT last_seq, payload FROM snapshots ORDER BY id DESC LIMIT 1').fetchone()
+            last_seq, state = (row[0], json.loads(row[1])) if row else (0, {})
+            entries = conn.execute(
+                'SELECT seq, op, agent_id, section, key, payload FROM wal_entries WHERE seq > ? ORDER BY seq',
+                (last_seq,)
+            ).fetchall()
+
+        for seq, op, agent_id, section, key, payload in entries:
+            self._apply(state, op, agent_id, section, key, json.loads(payload) if payload is not None else None)
+            last_seq = seq
+
+        with self._lock:
+            self.state = state
+            self.seq = last_seq
+            self._loaded = True
+        self.logger.info(
+            f"Recovered state for {len(state)} agents from snapshot plus {len(entries)} log entries "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+        return state
+
+    def start(self):
+        """Start the background writer thread, recovering persisted state first if needed"""
+        if self._writer is not None:
+            return
+        if not self._loaded:
+            self.load()
+        self._stopping.clear()
+        self._writer = threading.Thread(target=self._write_loop, name='state-store-writer', daemon=True)
+        self._writer.start()
+
+    def stop(self):
+        """Flush pending entries, write a final snapshot and stop the writer thread"""
+        if self._writer is None:
+            return
+        self._stopping.set()
+        self._writer.join()
+        self._writer = None
+
+    def flush(self):
+        """Block until every entry recorded so far has been written"""
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                self._raise_if_failed()
+                if self._writer is None or not self._writer.is_alive():
+                    raise RuntimeError("State writer is not running")
+                self._queue.all_tasks_done.wait(self.flush_interval)
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError("State writer failed; recorded state is no longer being persisted") from self._error
+
+    def put(self, agent_id: str, section: str, value: Any):
+        """Replace a whole state section, e.g. an agent's performance_metrics"""
+        self._record('put', agent_id, section, None, value)
+
+    def set(self, agent_id: str, section: str, key: str, value: Any):
+        """Set a single entry in a dict section, e.g. one position"""
+        self._record('set', agent_id, section, key, value)
+
+    def delete(self, agent_id: str, section: str, key: str):
+        """Remove a single entry from a dict section"""
+        self._record('delete', agent_id, section, key, None)
+
+    def capture_agent(self, agent_id: str, agent: Any):
+        """Log the persisted attributes of an agent as whole sections"""
+        for attribute in AGENT_STATE_ATTRIBUTES:
+            if hasattr(agent, attribute):
+                self.put(agent_id, attribute, getattr(agent, attribute))
+
+    def restore_agent(self, agent_id: str, agent: Any):
+        """Copy recovered sections back onto an agent"""
+        # Agents get their own copies: in-place changes must go through the log, and the writer
+        # serialises self.state under the lock while agents mutate their attributes without it
+        with self._lock:
+            sections = copy.deepcopy(self.state.get(agent_id, {}))
+        for attribute, value in sections.items():
+            if attribute in AGENT_STATE_ATTRIBUTES:
+                setattr(agent, attribute, value)
+
+    def _record(self, op: str, agent_id: str, section: str, key: Optional[str], value: Any):
+        self._raise_if_failed()
+        if not self._loaded:
+            # Writing before recovery would restart the sequence below the last snapshot's
+            self.load()
+        payload = json.dumps(value, default=str) if op != 'delete' else None
+        with self._lock:
+            self._apply(self.state, op, agent_id, section, key, json.loads(payload) if payload else None)
+            self.seq += 1
+            self._queue.put((self.seq, op, agent_id, section, key, payload))
+
+    @staticmethod
+    def _apply(state: Dict[str, Dict[str, Any]], op: str, agent_id: str, section: str,
+               key: Optional[str], value: Any):
+        sections = state.setdefault(agent_id, {})
+        if op == 'put':
+            sections[section] = value
+        elif op == 'set':
+            sections.setdefault(section, {})[key] = value
+        elif op == 'delete':
+            sections.get(section, {}).pop(key, None)
+        else:
+            raise ValueError(f"Unknown state operation: {op}")
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch:
+                    self._write_batch(conn, batch)
+                if self._snapshot_due():
+                    self._with_retries(self._write_snapshot, conn)
+                if self._stopping.is_set() and self._queue.empty():
+                    break
+            self._with_retries(self._write_snapshot, conn)
+        except Exception as e:
+            self.logger.error(f"State writer failed: {str(e)}")
+            self._error = self._error or e
+            # Release flush() waiters; later writes raise instead of queueing forever
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> List[Tuple]:
+        """Wait up to flush_interval for the first entry, then take whatever else is queued"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple]):
+        try:
+            self._with_retries(self._insert_entries, conn, batch)
+            self._entries_since_snapshot += len(batch)
+        except Exception as e:
+            # Recorded before the batch is marked done so flush() cannot return as if it succeeded
+            self._error = e
+            raise
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    @staticmethod
+    def _insert_entries(conn: sqlite3.Connection, batch: List[Tuple]):
+        with conn:
+            conn.executemany(
+                'INSERT INTO wal_entries (seq, op, agent_id, section, key, payload) VALUES (?, ?, ?, ?, ?, ?)',
+                batch
+            )
+
+    def _with_retries(self, operation, *args):
+        """Run a sqlite write, retrying transient failures with exponential backoff"""
+        for attempt in range(self.max_write_retries + 1):
+            try:
+                return operation(*args)
+            except sqlite3.Error as e:
+                if attempt == self.max_write_retries:
+                    raise
+                self.logger.warning(f"State write failed ({str(e)}), retrying")
+                time.sleep(self.retry_backoff * (2 ** attempt))
+
+    def _snapshot_due(self) -> bool:
+        return (
+            self._entries_since_snapshot >= self.snapshot_every
+            or (self._entries_since_snapshot > 0 and time.monotonic() - self._last_snapshot >= self.snapshot_interval)
+        )
+
+    def _write_snapshot(self, conn: sqlite3.Connection):
+        """Persist the in-memory state and drop the log entries and snapshots it supersedes"""
+        with self._lock:
+            payload = json.dumps(self.state, default=str)
+            last_seq = self.seq
+        # Entries up to last_seq still queued are written later and skipped on replay
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO snapshots (created_at, last_seq, payload) VALUES (?, ?, ?)',
+                (time.time(), last_seq, payload)
+            )
+            conn.execute('DELETE FROM snapshots WHERE id < ?', (cursor.lastrowid,))
+            conn.execute('DELETE FROM wal_entries WHERE seq <= ?', (last_seq,))
+        self._entries_since_snapshot = 0
+        self._last_snapshot = time.monotonic()
+        self.logger.info(f"Wrote state snapshot at sequence {last_seq}")
@@ -0,0 +1,97 @@
+import pytest
+import asyncio
+import math
+from src.dashboard_stream import DashboardStreamManager, DownsamplingPyramid, TIMEFRAMES
+
+@pytest.fixture
+def manager():
+    return DashboardStreamManager({'base_bucket_seconds': 60, 'max_buckets': 100})
+
+def feed(manager, start, count, step):
+    """Record a synthetic equity curve with one tick every step seconds"""
+    for i in range(count):
+        manager.record(start + i * step, 1000 + 100 * math.sin(i / 50) + i * 0.01, {'max_drawdown': 0.05})
+
+def apply_message(points, message):
+    """Apply a stream message the same way the dashboard does"""
+    if message['type'] == 'snapshot':
+        return list(message['points'])
+    kept = [p for p in points if message['window_start'] <= p['timestamp'] < message['since']]
+    return kept + message['points']
+
+def test_view_is_bounded_for_every_timeframe(manager):
+    """Test that each timeframe is served at a few hundred points at most"""
+    feed(manager, 0, 60000, 600)  # roughly 14 months of 10 minute ticks
+    for window in TIMEFRAMES.values():
+        _, buckets = manager.pyramid.view(window)
+        points = [p for b in buckets for p in b.points()]
+        assert 0 < len(points) <= 3 * (manager.pyramid.max_buckets + 1)
+
+def test_all_timeframe_covers_full_history(manager):
+    """Test that the ALL view spans back to the first tick"""
+    feed(manager, 0, 20000, 600)
+    _, buckets = manager.pyramid.view(None)
+    assert buckets[0].start == 0
+    assert len(buckets) <= manager.pyramid.max_buckets
+
+def test_extremes_are_preserved():
+    """Test that min/max bucketing keeps spikes visible after downsampling"""
+    pyramid = DownsamplingPyramid(base_width=1.0, max_buckets=10)
+    for i in range(1000):
+        equity = 5000.0 if i == 537 else 1000.0 - (500.0 if i == 811 else 0.0)
+        pyramid.add({'timestamp': float(i), 'equity': equity})
+    _, buckets = pyramid.view(None)
+    values = [p['equity'] for b in buckets for p in b.points()]
+    assert max(values) == 5000.0
+    assert min(values) == 500.0
+
+def test_deltas_reconstruct_snapshot(manager):
+    """Test that applying deltas to the initial snapshot matches a fresh snapshot"""
+    feed(manager, 0, 500, 60)
+    subscription = manager.subscribe('1D')
+    points = apply_message([], subscription.queue.get_nowait())
+
+    for batch in range(5):
+        feed(manager, 30000 + batch * 3000, 50, 60)
+        # Out-of-order tick older than the last bucket already sent
+        manager.record(30000 + batch * 3000 - 1000, 900.0)
+        manager.flush()
+        message = subscription.queue.get_nowait()
+        assert message['type'] == 'delta'
+        points = apply_message(points, message)
+
+    fresh = manager.subscribe('1D').queue.get_nowait()
+    assert points == fresh['points']
+    timestamps = [p['timestamp'] for p in points]
+    assert timestamps == sorted(timestamps)
+
+def test_flush_skips_idle_subscribers(manager):
+    """Test that no message is queued when nothing changed"""
+    feed(manager, 0, 10, 60)
+    subscription = manager.subscribe('1W')
+    subscription.queue.get_nowait()
+    manager.flush()
+    assert subscription.queue.empty()
+
+def test_unknown_timeframe(manager):
+    """Test that unknown timeframes are rejected"""
+    with pytest.raises(ValueError):
+        manager.subscribe('5Y')
+
+def test_stream_sends_configured_origin():
+    """Test that the SSE response only allows the configured dashboard origin"""
+    manager = DashboardStreamManager({'allowed_origin': 'https://dashboard.example'})
+    manager.record(0, 1000.0)
+
+    async def fetch_headers():
+        server = await asyncio.start_server(manager._handle_client, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /stream?timeframe=1D HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        headers = (await reader.readuntil(b'\r\n\r\n')).decode()
+        writer.close()
+        server.close()
+        return headers
+
+    headers = asyncio.run(fetch_headers())
+    assert 'Access-Control-Allow-Origin: https://dashboard.example\r\n' in headers
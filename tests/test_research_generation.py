@@ -0,0 +1,141 @@
+import pytest
+import asyncio
+import json
+import time
+from src.research_generation import ResearchGenerator, ResponseCache, TokenBucket, SECTION_PROMPTS
+from src.research_pipeline import ResearchPipelineManager
+
+class StubMessage:
+    def __init__(self, content):
+        self.content = content
+
+class StubLLM:
+    """Local stand-in for a LangChain chat model"""
+    model_name = 'stub-model'
+
+    def __init__(self, latency=0.01, failures=0, fail_on=None):
+        self.latency = latency
+        self.failures = failures
+        self.fail_on = fail_on
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError('rate limited')
+            if self.fail_on and self.fail_on in prompt:
+                raise RuntimeError('content filtered')
+            return StubMessage(f'answer: {prompt}')
+        finally:
+            self.active -= 1
+
+@pytest.fixture
+def config():
+    return {'requests_per_minute': 60000, 'max_concurrency': 3, 'retry_backoff': 0.0}
+
+def prompt_count(topics):
+    return len(topics) * sum(len(templates) for templates in SECTION_PROMPTS.values())
+
+def test_generates_research_sections(tmp_path, config):
+    """Test that research files contain the sections the pipeline consumes"""
+    generator = ResearchGenerator(tmp_path, StubLLM(), config)
+    files = asyncio.run(generator.generate(['momentum']))
+
+    with open(tmp_path / 'data' / 'raw_research' / files['momentum']) as f:
+        research = json.load(f)
+    assert research['model'] == 'stub-model'
+    assert set(research['strategy_analysis']) == {'entry', 'exit', 'position', 'risk'}
+    assert set(research['ml_implementation']) == {'features', 'models', 'training'}
+    assert research['strategy_analysis']['entry'].startswith('answer: ')
+
+def test_concurrency_is_bounded(tmp_path, config):
+    """Test that prompts run concurrently but within max_concurrency"""
+    llm = StubLLM(latency=0.05)
+    generator = ResearchGenerator(tmp_path, llm, config)
+    asyncio.run(generator.generate(['momentum', 'mean reversion']))
+    assert llm.calls == prompt_count(['momentum', 'mean reversion'])
+    assert 1 < llm.max_active <= config['max_concurrency']
+
+def test_cache_hits_skip_llm(tmp_path, config):
+    """Test that a re-run is served entirely from the response cache"""
+    llm = StubLLM()
+    asyncio.run(ResearchGenerator(tmp_path, llm, config).generate(['momentum']))
+    calls = llm.calls
+
+    generator = ResearchGenerator(tmp_path, llm, config)
+    asyncio.run(generator.generate(['momentum']))
+    assert llm.calls == calls
+    assert generator.stats == {'cache_hits': prompt_count(['momentum']), 'llm_calls': 0}
+
+def test_cache_is_keyed_by_model(tmp_path):
+    """Test that the same prompt for different models is cached separately"""
+    cache = ResponseCache(tmp_path)
+    cache.put('model-a', 'prompt', 'a')
+    assert cache.get('model-a', 'prompt') == 'a'
+    assert cache.get('model-b', 'prompt') is None
+
+def test_retries_failed_calls(tmp_path, config):
+    """Test that transient LLM failures are retried"""
+    llm = StubLLM(failures=2)
+    generator = ResearchGenerator(tmp_path, llm, config)
+    asyncio.run(generator.generate(['momentum']))
+    assert llm.calls == prompt_count(['momentum']) + 2
+
+def test_token_bucket_limits_rate():
+    """Test that acquisitions beyond the burst wait for refill"""
+    bucket = TokenBucket(rate=20.0, capacity=2)
+
+    async def acquire_all():
+        for _ in range(6):
+            await bucket.acquire()
+
+    started = time.monotonic()
+    asyncio.run(acquire_all())
+    assert time.monotonic() - started >= 0.18
+
+def test_pipeline_generate_and_process(tmp_path, config):
+    """Test generation feeding straight into research processing"""
+    manager = ResearchPipelineManager(tmp_path)
+    generator = ResearchGenerator(tmp_path, StubLLM(), config)
+    components = asyncio.run(manager.generate_and_process(generator, ['momentum']))
+    assert list(components) == ['momentum']
+    assert set(components['momentum']) == {'strategy', 'risk', 'ml'}
+
+def test_similar_topics_do_not_collide(tmp_path, config):
+    """Test that topics sharing a slug get separate raw and processed files"""
+    manager = ResearchPipelineManager(tmp_path)
+    generator = ResearchGenerator(tmp_path, StubLLM(), config)
+    topics = ['Mean Reversion', 'mean-reversion', 'momentum']
+    components = asyncio.run(manager.generate_and_process(generator, topics))
+    assert len(components) == 3
+    assert len(list((tmp_path / 'data' / 'raw_research').glob('*.json'))) == 3
+    assert len(list((tmp_path / 'data' / 'processed_results').glob('*.json'))) == 3
+
+def test_concurrent_identical_prompts_share_one_call(tmp_path, config):
+    """Test that identical prompts in flight at the same time make a single LLM call"""
+    llm = StubLLM(latency=0.05)
+    generator = ResearchGenerator(tmp_path, llm, config)
+
+    async def generate_twice():
+        return await asyncio.gather(generator.generate(['momentum']), generator.generate(['momentum']))
+
+    asyncio.run(generate_twice())
+    assert llm.calls == prompt_count(['momentum'])
+    assert generator.stats['cache_hits'] == prompt_count(['momentum'])
+
+def test_failed_topics_do_not_block_others(tmp_path, config):
+    """Test that topics that fail after retries are reported and the rest are still processed"""
+    config['max_retries'] = 0
+    manager = ResearchPipelineManager(tmp_path)
+    generator = ResearchGenerator(tmp_path, StubLLM(fail_on='breakout'), config)
+    components = asyncio.run(manager.generate_and_process(generator, ['momentum', 'breakout', 'pairs']))
+    assert set(components) == {'momentum', 'pairs'}
+    assert list(generator.failed_topics) == ['breakout']
+    assert len(list((tmp_path / 'data' / 'processed_results').glob('*.json'))) == 2
@@ -0,0 +1,218 @@
+import pytest
+import time
+from datetime import datetime
+from src.sharded_runtime import SharedRingBuffer, ShardedAgentRuntime, shard_for
+
+class RecordingAgent:
+    """Minimal agent that echoes what it receives"""
+    def __init__(self, agent_id, config):
+        self.agent_id = agent_id
+        self.config = config
+        self.current_positions = {}
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def process_message(self, message):
+        content = message['content']
+        if message['message_type'] == 'market_data':
+            self.current_positions[content['symbol']] = content['price']
+            return {'status': 'tick', 'symbol': content['symbol'], 'history': len(content['price_history'])}
+        if message['message_type'] == 'emergency_stop':
+            self.current_positions.clear()
+            return {'status': 'emergency_stop_executed', 'reason': content['reason']}
+        return {'status': 'received', 'message_type': message['message_type']}
+
+class StuckAgent(RecordingAgent):
+    """Agent whose message handling blocks the shard's event loop"""
+    async def process_message(self, message):
+        if message['message_type'] == 'block':
+            time.sleep(30)
+        return await super().process_message(message)
+
+class FailingAgent(RecordingAgent):
+    """Agent that crashes its shard during startup"""
+    async def initialize(self):
+        raise RuntimeError('cannot connect to exchange')
+
+AGENT_CLASS = f'{__name__}:RecordingAgent'
+
+@pytest.fixture
+def ring():
+    ring = SharedRingBuffer(capacity=8)
+    yield ring
+    ring.close()
+
+@pytest.fixture
+def agent_configs():
+    return {
+        'momentum_btc': {'agent_class': AGENT_CLASS, 'symbols': ['BTC/USD']},
+        'momentum_eth': {'agent_class': AGENT_CLASS, 'symbols': ['ETH/USD']},
+        'risk_manager': {'agent_class': AGENT_CLASS}
+    }
+
+def wait_for_results(runtime, count, timeout=10.0):
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        results.extend(runtime.collect_results())
+        time.sleep(0.01)
+    return results
+
+def message(message_type):
+    return {
+        'sender': 'test',
+        'message_type': message_type,
+        'content': {},
+        'priority': 1,
+        'timestamp': datetime.now()
+    }
+
+def test_ring_buffer_round_trip(ring):
+    """Test that ticks are read back in order through a second handle on the segment"""
+    reader = SharedRingBuffer(capacity=8, name=ring.name)
+    ring.write('BTC/USD', 100.0, 5.0, 1.0)
+    ring.write('ETH/USD', 10.0, 2.0, 2.0)
+    assert reader.read() == [('BTC/USD', 100.0, 5.0, 1.0), ('ETH/USD', 10.0, 2.0, 2.0)]
+    assert reader.read() == []
+    reader.shm.close()
+
+def test_ring_buffer_overrun(ring):
+    """Test that a lapped reader skips to the oldest retained tick"""
+    for i in range(20):
+        ring.write('BTC/USD', float(i), 1.0, float(i))
+    records = ring.read()
+    assert [r[1] for r in records] == [float(i) for i in range(12, 20)]
+    assert ring.overruns == 12
+
+def test_shard_assignment_is_stable():
+    """Test that shard assignment is deterministic and in range"""
+    assert shard_for('momentum_btc', 4) == shard_for('momentum_btc', 4)
+    assert 0 <= shard_for('BTC/USD', 3) < 3
+
+def test_long_symbols_are_rejected(ring, agent_configs):
+    """Test that symbols too wide for the ring buffer are refused instead of truncated"""
+    with pytest.raises(ValueError):
+        ring.write('BTC-PERPETUAL/USDT', 100.0, 1.0, 1.0)
+    agent_configs['perp'] = {'agent_class': AGENT_CLASS, 'symbols': ['BTC-PERPETUAL/USDT']}
+    with pytest.raises(ValueError):
+        ShardedAgentRuntime(agent_configs)
+
+def test_invalid_shard_by(agent_configs):
+    """Test that unknown sharding keys are rejected"""
+    with pytest.raises(ValueError):
+        ShardedAgentRuntime(agent_configs, {'shard_by': 'sector'})
+
+def test_market_data_and_messages(agent_configs):
+    """Test that ticks and envelopes reach only the agents they target"""
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 2, 'shard_by': 'symbol'})
+    runtime.start()
+    try:
+        runtime.publish_market_data('BTC/USD', 100.0, 10.0)
+        runtime.publish_market_data('BTC/USD', 101.0, 12.0)
+        runtime.send_message('risk_manager', message('risk_update'))
+        results = wait_for_results(runtime, 3)
+        by_agent = {}
+        for _, agent_id, result in results:
+            by_agent.setdefault(agent_id, []).append(result)
+        assert [r['history'] for r in by_agent['momentum_btc']] == [1, 2]
+        assert by_agent['risk_manager'] == [{'status': 'received', 'message_type': 'risk_update'}]
+        assert 'momentum_eth' not in by_agent
+    finally:
+        runtime.shutdown()
+
+def test_emergency_stop_reaches_all_shards(agent_configs):
+    """Test emergency stop fan-out to every shard"""
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 3, 'emergency_timeout': 5.0})
+    runtime.start()
+    try:
+        statuses = runtime.emergency_stop('risk_limit_breach')
+        assert set(statuses) == set(runtime.processes)
+        for results in statuses.values():
+            for result in results.values():
+                assert result == {'status': 'emergency_stop_executed', 'reason': 'risk_limit_breach'}
+    finally:
+        runtime.shutdown()
+
+def test_repeated_emergency_stops(agent_configs):
+    """Test that back-to-back emergency stops are each acknowledged by healthy shards"""
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 2, 'poll_interval': 0.05, 'emergency_timeout': 5.0})
+    runtime.start()
+    try:
+        first = runtime.emergency_stop('first')
+        second = runtime.emergency_stop('second')
+        assert 'terminated' not in first.values()
+        assert 'terminated' not in second.values()
+        for results in second.values():
+            assert all(result['reason'] == 'second' for result in results.values())
+    finally:
+        runtime.shutdown()
+
+def test_emergency_stop_long_reason(agent_configs):
+    """Test that oversized reasons are truncated rather than crashing the shards"""
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 1, 'emergency_timeout': 5.0})
+    runtime.start()
+    try:
+        statuses = runtime.emergency_stop('\u00e9' * 2000)
+        for results in statuses.values():
+            assert results != 'terminated'
+            for result in results.values():
+                assert result['reason'] == '\u00e9' * 256
+    finally:
+        runtime.shutdown()
+
+def test_emergency_stop_is_bounded(agent_configs):
+    """Test that a blocked shard is terminated at the emergency deadline"""
+    agent_configs['stuck'] = {'agent_class': f'{__name__}:StuckAgent'}
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 1, 'emergency_timeout': 2.0})
+    runtime.start()
+    try:
+        runtime.send_message('stuck', message('ping'))
+        assert wait_for_results(runtime, 1)
+        runtime.send_message('stuck', message('block'))
+        time.sleep(0.5)
+        started = time.monotonic()
+        statuses = runtime.emergency_stop('risk_limit_breach')
+        assert time.monotonic() - started < 3.0
+        assert list(statuses.values()) == ['terminated']
+    finally:
+        runtime.shutdown()
+
+def test_broadcast_after_termination(agent_configs):
+    """Test that envelopes still reach healthy shards after another shard was terminated"""
+    agent_configs['stuck'] = {'agent_class': f'{__name__}:StuckAgent'}
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 4, 'emergency_timeout': 2.0})
+    runtime.start()
+    try:
+        stuck_shard = runtime.agent_shards['stuck']
+        healthy = [agent_id for agent_id, shard in runtime.agent_shards.items() if shard != stuck_shard]
+        assert healthy
+        runtime.send_message('stuck', message('ping'))
+        assert wait_for_results(runtime, 1)
+        runtime.send_message('stuck', message('block'))
+        time.sleep(0.5)
+        statuses = runtime.emergency_stop('risk_limit_breach')
+        assert statuses[stuck_shard] == 'terminated'
+        runtime.collect_results()
+
+        assert runtime.send_message('stuck', message('ping')) is False
+        delivered = runtime.broadcast(message('risk_update'))
+        assert delivered[stuck_shard] is False
+        results = wait_for_results(runtime, len(healthy))
+        assert sorted(agent_id for _, agent_id, _ in results) == sorted(healthy)
+    finally:
+        runtime.shutdown()
+
+def test_emergency_stop_reports_dead_shards(agent_configs):
+    """Test that shards that crashed before the stop are reported rather than omitted"""
+    agent_configs = {'broken': {'agent_class': f'{__name__}:FailingAgent'}}
+    runtime = ShardedAgentRuntime(agent_configs, {'workers': 1})
+    runtime.start()
+    try:
+        runtime.processes[runtime.agent_shards['broken']].join(10)
+        assert runtime.emergency_stop('risk_limit_breach') == {runtime.agent_shards['broken']: 'dead'}
+    finally:
+        runtime.shutdown()
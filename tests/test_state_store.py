@@ -0,0 +1,152 @@
+import pytest
+import sqlite3
+import time
+from src.state_store import StateStore, sqlite_path
+
+class DummyAgent:
+    def __init__(self):
+        self.current_positions = {}
+        self.performance_metrics = {'total_trades': 0, 'winning_trades': 0, 'total_pnl': 0.0}
+        self.risk_metrics = {}
+        self.market_regime = 'normal'
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'state.db')
+
+@pytest.fixture
+def store(db_path):
+    store = StateStore(db_path, {'snapshot_interval': 3600})
+    store.start()
+    yield store
+    store.stop()
+
+def test_sqlite_path():
+    """Test database URL parsing"""
+    assert sqlite_path('sqlite:///test.db') == 'test.db'
+    with pytest.raises(ValueError):
+        sqlite_path('postgresql://localhost/trading')
+
+def test_wal_mode(store, db_path):
+    """Test that the database is opened in WAL mode"""
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
+
+def test_recover_from_log_tail(store, db_path):
+    """Test recovery from log entries written without a snapshot"""
+    store.set('momentum', 'current_positions', 'BTC/USD', {'size': 0.1, 'entry_price': 100.0})
+    store.set('momentum', 'current_positions', 'ETH/USD', {'size': 1.0, 'entry_price': 10.0})
+    store.delete('momentum', 'current_positions', 'BTC/USD')
+    store.put('momentum', 'market_regime', 'trending')
+    store.flush()
+
+    recovered = StateStore(db_path).load()
+    assert recovered == {
+        'momentum': {
+            'current_positions': {'ETH/USD': {'size': 1.0, 'entry_price': 10.0}},
+            'market_regime': 'trending'
+        }
+    }
+
+def test_recover_from_snapshot_and_tail(db_path):
+    """Test that a snapshot compacts the log and later entries are replayed on top"""
+    store = StateStore(db_path, {'snapshot_every': 100})
+    store.start()
+    for i in range(150):
+        store.set('risk_manager', 'risk_metrics', f'pos{i}', i)
+    store.flush()
+    store.set('risk_manager', 'risk_metrics', 'pos0', -1)
+    store.flush()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0] == 1
+    assert conn.execute('SELECT COUNT(*) FROM wal_entries').fetchone()[0] < 151
+    conn.close()
+
+    recovered = StateStore(db_path)
+    state = recovered.load()
+    assert len(state['risk_manager']['risk_metrics']) == 150
+    assert state['risk_manager']['risk_metrics']['pos0'] == -1
+    assert recovered.seq == 151
+    store.stop()
+
+def test_restart_without_explicit_load(store, db_path):
+    """Test that a reopened store recovers before writing instead of clobbering the old snapshot"""
+    for i in range(20):
+        store.set('momentum', 'current_positions', f'SYM{i}', i)
+    store.stop()
+
+    reopened = StateStore(db_path)
+    reopened.start()
+    reopened.set('momentum', 'current_positions', 'NEW', 1)
+    reopened.stop()
+
+    state = StateStore(db_path).load()
+    assert len(state['momentum']['current_positions']) == 21
+    assert state['momentum']['current_positions']['NEW'] == 1
+
+def test_writer_failure_is_surfaced(db_path):
+    """Test that flush and later writes raise once the writer gives up"""
+    store = StateStore(db_path, {'max_write_retries': 1, 'retry_backoff': 0.0})
+    store.start()
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO wal_entries (seq, op, agent_id, section) VALUES (1, 'put', 'x', 'y')")
+    conn.commit()
+    conn.close()
+
+    store.set('momentum', 'current_positions', 'BTC/USD', 1)
+    with pytest.raises(RuntimeError):
+        store.flush()
+    with pytest.raises(RuntimeError):
+        store.set('momentum', 'current_positions', 'ETH/USD', 1)
+    store.stop()
+
+def test_agent_round_trip(store, db_path):
+    """Test capturing and restoring agent attributes"""
+    agent = DummyAgent()
+    agent.current_positions['BTC/USD'] = {'size': 0.5}
+    agent.performance_metrics['total_trades'] = 3
+    store.capture_agent('momentum', agent)
+    store.stop()
+
+    recovered = StateStore(db_path)
+    recovered.load()
+    restored = DummyAgent()
+    recovered.restore_agent('momentum', restored)
+    assert restored.current_positions == {'BTC/USD': {'size': 0.5}}
+    assert restored.performance_metrics['total_trades'] == 3
+    assert restored.market_regime == 'normal'
+
+def test_restored_agent_does_not_share_state(store, db_path):
+    """Test that in-place changes to a restored agent bypass neither the log nor the snapshot"""
+    store.set('momentum', 'current_positions', 'BTC/USD', {'size': 0.5})
+    store.stop()
+
+    recovered = StateStore(db_path)
+    recovered.load()
+    agent = DummyAgent()
+    recovered.restore_agent('momentum', agent)
+    agent.current_positions['ETH/USD'] = {'size': 1.0}
+    agent.current_positions['BTC/USD']['size'] = 0.0
+    assert recovered.state['momentum']['current_positions'] == {'BTC/USD': {'size': 0.5}}
+
+    recovered.start()
+    recovered.stop()
+    assert StateStore(db_path).load()['momentum']['current_positions'] == {'BTC/USD': {'size': 0.5}}
+
+def test_recovery_is_fast_for_large_books(store, db_path):
+    """Test recovery of thousands of positions within a second"""
+    for i in range(5000):
+        store.set('momentum', 'current_positions', f'SYM{i}', {'size': 0.01, 'entry_price': 100.0 + i})
+    store.stop()
+    for i in range(2000):
+        store.set('momentum', 'current_positions', f'SYM{i}', {'size': 0.02, 'entry_price': 100.0 + i})
+    store.start()
+    store.flush()
+
+    started = time.perf_counter()
+    state = StateStore(db_path).load()
+    assert time.perf_counter() - started < 1.0
+    assert len(state['momentum']['current_positions']) == 5000
+    assert state['momentum']['current_positions']['SYM0']['size'] == 0.02